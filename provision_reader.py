@@ -6,35 +6,349 @@ and create a login user in the reader account.
 See config.yaml for structure.
 """
 
+import os
+import re
 import sys
+import copy
+import json
+import pickle
 import time
+import logging
+import tempfile
 import smtplib
+import urllib.parse
+from collections import OrderedDict
 from email.message import EmailMessage
 import yaml
 import snowflake.connector
 from snowflake.connector.errors import ProgrammingError
 
+# Prefer the LibYAML C loader; fall back to the pure-Python one if PyYAML was
+# built without it.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 # ---------- simple logging ----------
 
-def log(msg: str) -> None:
-    print(f"[provision] {msg}")
+# Use %-style args (log("... %s", value)) in loops so formatting is deferred
+# until a handler actually emits the record.
+logger = logging.getLogger("provision")
+log = logger.info
+# Errors and warnings go out at their real level, so they are still printed
+# (via logging.lastResort) when the module is used without main() configuring
+# a handler.
+log_warning = logger.warning
+log_error = logger.error
+
+
+def _configure_logging() -> None:
+    """
+    Send this script's log records to stdout with the "[provision]" prefix.
+    Only the "provision" logger is configured: the root logger stays at
+    WARNING, so the connector's INFO logging (which includes query text with
+    bound passwords) is not printed.
+    """
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("[provision] %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
 
 
 # ---------- config loader ----------
 
+# path -> (mtime_ns, size, parsed config); least recently used entries are evicted first
+_CONFIG_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_CONFIG_CACHE_MAX = 100
+
+# How cached configs are copied for callers: "pickle" (default; a pickle
+# round-trip is several times faster than deepcopy for plain dict/list/str
+# trees) or "deepcopy". Overridable for benchmarking.
+_CONFIG_COPY_MODE = os.environ.get("PROVISION_CONFIG_COPY", "pickle")
+
+
+def _copy_config(cfg):
+    if _CONFIG_COPY_MODE == "deepcopy":
+        return copy.deepcopy(cfg)
+    return pickle.loads(pickle.dumps(cfg, pickle.HIGHEST_PROTOCOL))
+
+
+def _sidecar_path(path: str) -> str:
+    return f"{path}.cache.json"
+
+
+def _read_config_sidecar(path: str, st: os.stat_result):
+    """
+    Return the config stored in the JSON sidecar for `path`, or None if there
+    is no sidecar or it was written for a different version of the file.
+
+    The sidecar's first line is a {"mtime_ns": ..., "size": ...} header; the
+    rest is the parsed config as JSON.
+    """
+    try:
+        with open(_sidecar_path(path), "r") as f:
+            header = json.loads(f.readline())
+            if header.get("mtime_ns") != st.st_mtime_ns or header.get("size") != st.st_size:
+                return None
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_config_sidecar(path: str, st: os.stat_result, cfg) -> None:
+    """
+    Best-effort atomic write of the JSON sidecar for `path`. The sidecar holds
+    the same secrets as the config, so it is created owner-readable only.
+
+    Configs that JSON can't represent exactly (non-string keys, YAML dates,
+    ...) are not cached, so a warm load always returns the same data as a
+    fresh YAML parse.
+    """
+    try:
+        if json.loads(json.dumps(cfg)) != cfg:
+            return
+    except (TypeError, ValueError):
+        return
+
+    sidecar = _sidecar_path(path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(sidecar)), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"mtime_ns": st.st_mtime_ns, "size": st.st_size}, f)
+                f.write("\n")
+                json.dump(cfg, f)
+            os.replace(tmp_path, sidecar)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        log_warning(f"Could not write config cache '{sidecar}': {e}")
+
+
 def load_config(path: str = "config.yaml") -> dict:
+    """
+    Load and parse the YAML config at `path`.
+
+    Parsed configs are cached in-process keyed by path and revalidated against
+    the file's mtime and size, so repeated loads of an unchanged file skip the
+    YAML parse. Across runs, the parsed config is also kept in a JSON sidecar
+    (`<path>.cache.json`) validated the same way, which is much cheaper to
+    load than the YAML. Callers always get their own copy and may mutate it
+    freely.
+    """
     try:
-        with open(path, "r") as f:
-            cfg = yaml.safe_load(f)
-        return cfg
+        st = os.stat(path)
+        cached = _CONFIG_CACHE.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _CONFIG_CACHE.move_to_end(path)
+            return _copy_config(cached[2])
+
+        cfg = _read_config_sidecar(path, st)
+        if cfg is None:
+            # Binary mode lets LibYAML decode the raw bytes itself
+            with open(path, "rb") as f:
+                cfg = yaml.load(f, Loader=_YamlLoader)
+            _write_config_sidecar(path, st, cfg)
+
+        _CONFIG_CACHE[path] = (st.st_mtime_ns, st.st_size, cfg)
+        _CONFIG_CACHE.move_to_end(path)
+        while len(_CONFIG_CACHE) > _CONFIG_CACHE_MAX:
+            _CONFIG_CACHE.popitem(last=False)
+        return _copy_config(cfg)
     except Exception as e:
-        log(f"ERROR: Failed to read config file '{path}': {e}")
+        log_error(f"ERROR: Failed to read config file '{path}': {e}")
         sys.exit(1)
 
 
+# ---------- config validation ----------
+
+# Unquoted Snowflake identifier. Anything interpolated directly into SQL text
+# (where IDENTIFIER(%s) binding is not accepted) must match this.
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
+
+
+def check_identifier(value, label: str) -> str:
+    """
+    Exit with an error unless value is a plain unquoted Snowflake identifier.
+    """
+    if not isinstance(value, str) or not IDENTIFIER_RE.match(value):
+        log_error(f"ERROR: {label} must be a plain identifier (letters, digits, _ or $), got {value!r}.")
+        sys.exit(1)
+    return value
+
+
+def _require(cfg: dict, path: str, kind=str):
+    """
+    Return the value at dotted `path` in cfg (e.g. "provider.account"),
+    exiting with an error if it is missing or not of type `kind`.
+    """
+    value = cfg
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value or value[key] is None:
+            log_error(f"ERROR: Missing required config key '{path}'.")
+            sys.exit(1)
+        value = value[key]
+    if not isinstance(value, kind):
+        expected = " or ".join(k.__name__ for k in kind) if isinstance(kind, tuple) else kind.__name__
+        log_error(f"ERROR: Config key '{path}' must be of type {expected}, got {type(value).__name__}.")
+        sys.exit(1)
+    return value
+
+
+def _require_value(cfg: dict, path: str) -> str:
+    """
+    Like _require for credentials and other plain values: any scalar is
+    accepted (YAML reads e.g. `password: 12345678` as an int) and is stored
+    back into cfg as a string.
+    """
+    value = str(_require(cfg, path, (str, int, float)))
+    *parents, key = path.split(".")
+    parent = cfg
+    for name in parents:
+        parent = parent[name]
+    parent[key] = value
+    return value
+
+
+def _optional_str(mapping: dict, key: str, label: str) -> None:
+    value = mapping.get(key)
+    if value is not None and not isinstance(value, str):
+        log_error(f"ERROR: Config key '{label}' must be of type str, got {type(value).__name__}.")
+        sys.exit(1)
+
+
+def validate_config(cfg: dict) -> None:
+    """
+    Check that every key main() needs is present and well-formed, so a bad
+    config fails immediately instead of after connecting to Snowflake.
+    """
+    if not isinstance(cfg, dict):
+        log_error("ERROR: Config file is empty or not a mapping.")
+        sys.exit(1)
+
+    for key in ("account", "user", "password", "role"):
+        _require_value(cfg, f"provider.{key}")
+    for key in ("admin_user", "admin_password"):
+        _require_value(cfg, f"reader.{key}")
+    _require(cfg, "data", dict)
+
+    # Names end up in SQL text (directly, or via IDENTIFIER() binding), so
+    # reject anything that isn't a plain identifier before touching Snowflake.
+    for path in (
+        "reader.account_name",
+        "reader.warehouse_name",
+        "reader.db_name",
+        "share.name",
+        "data.provider_database",
+        "data.shared_schema",
+    ):
+        check_identifier(_require(cfg, path), path)
+
+    objects = cfg["data"].get("objects")
+    if isinstance(objects, list) and objects:
+        for i, obj in enumerate(objects):
+            prefix = f"data.objects[{i}]"
+            if not isinstance(obj, dict):
+                log_error(f"ERROR: Config entry '{prefix}' must be a mapping.")
+                sys.exit(1)
+            for key in ("shared_view_name", "source_table"):
+                check_identifier(_require(obj, key), f"{prefix}.{key}")
+            _optional_str(obj, "view_where", f"{prefix}.view_where")
+    else:
+        # Legacy single-object keys
+        for key in ("shared_view_name", "source_table"):
+            check_identifier(_require(cfg, f"data.{key}"), f"data.{key}")
+        _optional_str(cfg["data"], "view_where", "data.view_where")
+
+    if cfg.get("reader_user"):
+        check_identifier(_require(cfg, "reader_user.name"), "reader_user.name")
+        _require_value(cfg, "reader_user.email")
+        _require_value(cfg, "reader_user.temp_password")
+
+
 # ---------- helper functions ----------
 
+def execute_batch(cur, stmts: list, params: dict = None) -> None:
+    """
+    Run a list of SQL statements in order as one server-side multi-statement
+    request, so the whole block costs a single network round-trip instead of
+    one per statement. Snowflake aborts at the first failing statement.
+
+    params are bound across the whole batch, so statements reference them by
+    name, e.g. IDENTIFIER(%(share)s).
+    """
+    # The separator gets its own line so a trailing "-- comment" (e.g. at the
+    # end of a view's WHERE clause) can't swallow it.
+    sql_text = "\n;\n".join(stmt.strip() for stmt in stmts)
+    cur.execute(sql_text, params, num_statements=len(stmts))
+    # Drain the per-statement results so the cursor is clean for reuse.
+    while cur.nextset():
+        pass
+
+
+def _normalize_object_name(name: str) -> str:
+    """
+    Normalize a dotted object name the way Snowflake resolves it: unquoted
+    parts are upper-cased, quoted parts are kept as-is (minus the quotes).
+    """
+    parts = []
+    for part in name.split("."):
+        if len(part) >= 2 and part.startswith('"') and part.endswith('"'):
+            parts.append(part[1:-1])
+        else:
+            parts.append(part.upper())
+    return ".".join(parts)
+
+
+# Object types the provider phase grants to the share, and so reconciles
+_RECONCILED_GRANT_TYPES = ("DATABASE", "SCHEMA", "VIEW")
+
+
+def stale_share_grants(cur, share_name: str, wanted: set) -> list:
+    """
+    Return the grants on an existing share that are not in `wanted`, as
+    (privilege, granted_on, name) tuples from SHOW GRANTS TO SHARE. `wanted`
+    holds (privilege, granted_on, name) with names as _normalize_object_name
+    returns them. A share that doesn't exist yet has no stale grants.
+
+    Only grants on the object types this script manages (_RECONCILED_GRANT_TYPES)
+    are reconciled. Anything else, e.g. a FUNCTION whose name carries a
+    signature that IDENTIFIER() can't take, is logged and left in place.
+    """
+    try:
+        cur.execute("SHOW GRANTS TO SHARE IDENTIFIER(%s)", (share_name,))
+    except ProgrammingError as e:
+        if "does not exist" in str(e):
+            return []
+        raise
+    columns = [col[0].lower() for col in cur.description]
+    priv_idx = columns.index("privilege")
+    on_idx = columns.index("granted_on")
+    name_idx = columns.index("name")
+    stale = []
+    for row in cur.fetchall():
+        privilege = str(row[priv_idx]).upper()
+        granted_on = str(row[on_idx]).upper()
+        name = row[name_idx]
+        if granted_on not in _RECONCILED_GRANT_TYPES:
+            log_warning(
+                f"WARNING: Share {share_name} has {privilege} on {granted_on} {name}, "
+                "which this script does not manage; leaving it in place."
+            )
+            continue
+        if (privilege, granted_on, _normalize_object_name(name)) not in wanted:
+            stale.append((privilege, granted_on, name))
+    return stale
+
+
 def get_managed_account(cur, account_name: str):
     """
     Look up an existing managed account by name and return its info:
@@ -48,12 +362,11 @@ def get_managed_account(cur, account_name: str):
     We use SHOW MANAGED ACCOUNTS LIKE '<name>'.
     """
     log(f"SHOW MANAGED ACCOUNTS LIKE '{account_name}' ...")
-    cur.execute(f"SHOW MANAGED ACCOUNTS LIKE '{account_name}'")
-    rows = cur.fetchall()
-    if not rows:
+    cur.execute("SHOW MANAGED ACCOUNTS LIKE %s", (account_name,))
+    row = cur.fetchone()
+    if row is None:
         return None
 
-    row = rows[0]
     # Column order (based on Snowflake docs / typical output):
     # 0: account_name
     # 1: cloud
@@ -76,6 +389,10 @@ def get_managed_account(cur, account_name: str):
     }
 
 
+# Upper bound on how long to wait for a newly created managed account to show up
+MANAGED_ACCOUNT_POLL_TIMEOUT = 30
+
+
 def ensure_managed_account(cur, account_name: str, admin_user: str, admin_password: str):
     """
     Idempotently ensure the managed (reader) account exists.
@@ -93,13 +410,15 @@ def ensure_managed_account(cur, account_name: str, admin_user: str, admin_passwo
     # 2) Try to create it.
     log(f"Managed account '{account_name}' not found. Creating...")
     try:
+        # CREATE MANAGED ACCOUNT does not accept IDENTIFIER(), so the name is
+        # interpolated; validate_config() has already checked it.
         cur.execute(f"""
             CREATE MANAGED ACCOUNT {account_name}
               TYPE = READER
-              ADMIN_NAME = '{admin_user}'
-              ADMIN_PASSWORD = '{admin_password}'
+              ADMIN_NAME = %s
+              ADMIN_PASSWORD = %s
               COMMENT = 'Automated reader account for EXCLUDEDLISTS share'
-        """)
+        """, (admin_user, admin_password))
         log("CREATE MANAGED ACCOUNT executed.")
     except ProgrammingError as e:
         msg = str(e)
@@ -113,24 +432,63 @@ def ensure_managed_account(cur, account_name: str, admin_user: str, admin_passwo
             if info:
                 log(f"Using existing managed account locator {info['account_locator']}.")
                 return info
-            log(
+            log_error(
                 "Name collision: object exists but not visible as managed account. "
                 "Either drop/rename that object or use a different "
                 "reader.account_name in config.yaml."
             )
             sys.exit(1)
         else:
-            log(f"ERROR creating managed account: {e}")
+            log_error(f"ERROR creating managed account: {e}")
             sys.exit(1)
 
-    # 3) Give Snowflake a moment to register it
-    time.sleep(5)
+    # 3) Poll until Snowflake has registered it, backing off exponentially
+    deadline = time.monotonic() + MANAGED_ACCOUNT_POLL_TIMEOUT
+    delay = 0.25
+    while True:
+        info = get_managed_account(cur, account_name)
+        if info:
+            return info
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(delay, remaining))
+        delay *= 2
+
+    log_error(
+        "ERROR: Managed account creation succeeded but not found in SHOW MANAGED ACCOUNTS "
+        f"after {MANAGED_ACCOUNT_POLL_TIMEOUT}s."
+    )
+    sys.exit(1)
 
-    info = get_managed_account(cur, account_name)
-    if not info:
-        log("ERROR: Managed account creation succeeded but not found in SHOW MANAGED ACCOUNTS.")
-        sys.exit(1)
-    return info
+
+def share_has_account(cur, share_name: str, locator: str) -> bool:
+    """
+    Return True if the outbound share already lists the account (locator)
+    among its consumers, per the `to` column of SHOW SHARES.
+
+    Entries in `to` may be bare locators or <org>.<account>, so both the full
+    entry and its last component are compared, case-insensitively. LIKE treats
+    `_` as a wildcard, so rows are also filtered on the exact share name (the
+    last component of `name`, which is shown as <org>.<account>.<share>).
+    """
+    cur.execute("SHOW SHARES LIKE %s", (share_name,))
+    columns = [col[0].lower() for col in cur.description]
+    kind_idx = columns.index("kind")
+    name_idx = columns.index("name")
+    to_idx = columns.index("to")
+    wanted = locator.upper()
+    for row in cur.fetchall():
+        # LIKE may also match inbound shares with the same name
+        if str(row[kind_idx]).upper() != "OUTBOUND":
+            continue
+        if str(row[name_idx]).rsplit(".", 1)[-1].upper() != share_name.upper():
+            continue
+        for account in (row[to_idx] or "").split(","):
+            account = account.strip().upper()
+            if account == wanted or account.rsplit(".", 1)[-1] == wanted:
+                return True
+    return False
 
 
 def ensure_share_has_account(cur, share_name: str, locator: str) -> None:
@@ -138,8 +496,13 @@ def ensure_share_has_account(cur, share_name: str, locator: str) -> None:
     Idempotently ensure the reader account (locator) is added to the share.
     """
     log(f"Ensuring account {locator} is added to share {share_name}...")
+    # ADD ACCOUNTS takes a literal account list, so the locator is interpolated.
+    check_identifier(locator, "account locator")
+    if share_has_account(cur, share_name, locator):
+        log(f"Account {locator} already present in share {share_name}; continuing.")
+        return
     try:
-        cur.execute(f"ALTER SHARE {share_name} ADD ACCOUNTS = {locator}")
+        cur.execute(f"ALTER SHARE IDENTIFIER(%s) ADD ACCOUNTS = {locator}", (share_name,))
         log(f"Account {locator} added to share {share_name}.")
     except ProgrammingError as e:
         msg = str(e)
@@ -147,7 +510,7 @@ def ensure_share_has_account(cur, share_name: str, locator: str) -> None:
         if "cannot be added to this share" in msg:
             log(f"Account {locator} already present in share {share_name}; continuing.")
         else:
-            log(f"ERROR adding account to share: {e}")
+            log_error(f"ERROR adding account to share: {e}")
             sys.exit(1)
 
 
@@ -158,20 +521,11 @@ def account_identifier_from_url(account_url: str) -> str:
     return the Python connector account identifier:
       orgname-accountname
     """
-    url = account_url
-    if url.startswith("https://"):
-        url = url[len("https://") :]
-    elif url.startswith("http://"):
-        url = url[len("http://") :]
-
-    # Drop any path
-    url = url.split("/", 1)[0]
-    # Drop the .snowflakecomputing.com suffix
-    if ".snowflakecomputing.com" in url:
-        acct = url.split(".snowflakecomputing.com", 1)[0]
-    else:
-        acct = url
-    return acct
+    # urlsplit only finds the host after "//", so add it for scheme-less values
+    host = urllib.parse.urlsplit(
+        account_url if "://" in account_url else "//" + account_url
+    ).hostname or account_url
+    return host.removesuffix(".snowflakecomputing.com")
 
 
 def ensure_reader_user(cur, user_cfg: dict, default_wh: str):
@@ -193,39 +547,39 @@ def ensure_reader_user(cur, user_cfg: dict, default_wh: str):
     log(f"Ensuring reader user '{name}' exists...")
 
     # SHOW USERS LIKE '<name>' will match on user name
-    cur.execute(f"SHOW USERS LIKE '{name}'")
-    rows = cur.fetchall()
+    cur.execute("SHOW USERS LIKE %s", (name,))
+    row = cur.fetchone()
 
-    if not rows:
+    if row is None:
         # Create fresh user
         log(f"User '{name}' not found. Creating...")
-        cur.execute(f"""
-            CREATE USER {name}
-              LOGIN_NAME = '{name}'
-              PASSWORD = '{temp_pw}'
+        cur.execute("""
+            CREATE USER IDENTIFIER(%s)
+              LOGIN_NAME = %s
+              PASSWORD = %s
               MUST_CHANGE_PASSWORD = TRUE
               DEFAULT_ROLE = 'PUBLIC'
-              DEFAULT_WAREHOUSE = '{default_wh}'
-              EMAIL = '{email}'
-        """)
+              DEFAULT_WAREHOUSE = %s
+              EMAIL = %s
+        """, (name, name, temp_pw, default_wh, email))
         log(f"User '{name}' created with email {email}.")
         return {"created": True, "name": name, "email": email, "temp_password": temp_pw}
 
     # User exists: update metadata but do not reset password
     log(f"User '{name}' already exists. Updating email and default warehouse...")
-    cur.execute(f"""
-        ALTER USER {name}
-          SET EMAIL = '{email}',
-              DEFAULT_WAREHOUSE = '{default_wh}',
+    cur.execute("""
+        ALTER USER IDENTIFIER(%s)
+          SET EMAIL = %s,
+              DEFAULT_WAREHOUSE = %s,
               DEFAULT_ROLE = 'PUBLIC'
-    """)
+    """, (name, email, default_wh))
     log(f"User '{name}' updated (EMAIL={email}, DEFAULT_WAREHOUSE={default_wh}).")
     return {"created": False, "name": name, "email": email}
 
 
-def send_credentials_email(user_name: str, user_email: str, temp_password: str, login_url: str, smtp_cfg: dict) -> None:
+class SMTPSession:
     """
-    Send the reader's initial credentials via email using SMTP settings from config.
+    One SMTP connection (connect, EHLO, STARTTLS, AUTH) reused across messages.
 
     smtp_cfg expected keys (optional defaults in parentheses):
       - host (required)
@@ -235,21 +589,94 @@ def send_credentials_email(user_name: str, user_email: str, temp_password: str,
       - from (optional, falls back to user or 'no-reply@snowflake')
       - use_tls (bool, default True)
       - use_ssl (bool, default False)
+
+    The connection is opened lazily on the first send, so a session can be
+    created up front without paying for a handshake when nothing is sent.
     """
-    if not smtp_cfg or not smtp_cfg.get("host"):
+
+    def __init__(self, smtp_cfg: dict):
+        self.use_ssl = bool(smtp_cfg.get("use_ssl", False))
+        self.use_tls = bool(smtp_cfg.get("use_tls", True)) if not self.use_ssl else False
+        self.host = smtp_cfg["host"]
+        port = smtp_cfg.get("port")
+        if port is None:
+            port = 465 if self.use_ssl else (587 if self.use_tls else 25)
+        self.port = port
+        self.username = smtp_cfg.get("user")
+        self.password = smtp_cfg.get("password")
+        self.from_addr = smtp_cfg.get("from") or self.username or "no-reply@snowflake"
+        self.server = None
+
+    def connect(self) -> None:
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port)
+        else:
+            server = smtplib.SMTP(self.host, self.port)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls()
+                server.ehlo()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except BaseException:
+            server.close()
+            raise
+        self.server = server
+
+    def close(self) -> None:
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+    def send_message(self, msg: EmailMessage) -> None:
+        """
+        Send msg over the open connection, reconnecting first if a NOOP shows
+        the server has dropped it since the last message. A failure during the
+        send itself is not retried: the server may already have accepted the
+        message, and resending would deliver it twice.
+        """
+        if self.server is None:
+            self.connect()
+        else:
+            try:
+                self.server.noop()
+            except smtplib.SMTPServerDisconnected:
+                log("SMTP connection dropped; reconnecting...")
+                self.close()
+                self.connect()
+        self.server.send_message(msg)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def send_credentials_email(
+    user_name: str,
+    user_email: str,
+    temp_password: str,
+    login_url: str,
+    smtp_cfg: dict,
+    server: SMTPSession = None,
+) -> None:
+    """
+    Send the reader's initial credentials via email using SMTP settings from config.
+
+    If `server` is given, the message is sent over that already-established
+    SMTPSession; otherwise a short-lived session is opened from smtp_cfg (see
+    SMTPSession for the expected keys).
+    """
+    if server is None and (not smtp_cfg or not smtp_cfg.get("host")):
         log("SMTP config missing or incomplete; skipping email notification.")
         return
 
-    use_ssl = bool(smtp_cfg.get("use_ssl", False))
-    use_tls = bool(smtp_cfg.get("use_tls", True)) if not use_ssl else False
-    host = smtp_cfg["host"]
-    port = smtp_cfg.get("port")
-    if port is None:
-        port = 465 if use_ssl else (587 if use_tls else 25)
-    username = smtp_cfg.get("user")
-    password = smtp_cfg.get("password")
-    from_addr = smtp_cfg.get("from") or username or "no-reply@snowflake"
-
     subject = "Your Snowflake Reader Account Credentials"
     body = (
         "Hello,\n\n"
@@ -261,34 +688,53 @@ def send_credentials_email(user_name: str, user_email: str, temp_password: str,
         "If you did not expect this email, please contact the sender.\n"
     )
 
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = from_addr
-    msg["To"] = user_email
-    msg.set_content(body)
-
     try:
-        if use_ssl:
-            server = smtplib.SMTP_SSL(host, port)
+        if server is None:
+            with SMTPSession(smtp_cfg) as session:
+                _send_email(session, user_email, subject, body)
         else:
-            server = smtplib.SMTP(host, port)
-        with server:
-            server.ehlo()
-            if use_tls and not use_ssl:
-                server.starttls()
-                server.ehlo()
-            if username and password:
-                server.login(username, password)
-            server.send_message(msg)
+            _send_email(server, user_email, subject, body)
         log(f"Credentials email sent to {user_email}.")
     except Exception as e:
-        log(f"WARNING: Failed to send credentials email to {user_email}: {e}")
+        log_warning(f"WARNING: Failed to send credentials email to {user_email}: {e}")
+
+
+def _send_email(session: SMTPSession, to_addr: str, subject: str, body: str) -> None:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = session.from_addr
+    msg["To"] = to_addr
+    msg.set_content(body)
+    session.send_message(msg)
 
 
 # ---------- main ----------
 
+# The view body is stored as text, so IDENTIFIER() can't be used in it; names
+# are checked by validate_config(). {where} is an optional normalized WHERE clause.
+_VIEW_TMPL = (
+    "CREATE OR REPLACE SECURE VIEW {db}.{sch}.{sv} AS\n"
+    "SELECT *\n"
+    "FROM {db}.PUBLIC.{src}\n"
+    "{where}"
+)
+# Per-view grant; the view name is bound as the view_<i> batch parameter.
+_GRANT_VIEW_TMPL = "GRANT SELECT ON VIEW IDENTIFIER(%(view_{i})s) TO SHARE IDENTIFIER(%(share)s)"
+
+# Shared by both connections: keep the session (and its TLS connection) alive
+# for the whole phase, and fail fast on unreachable hosts.
+CONNECT_OPTIONS = {
+    "client_session_keep_alive": True,
+    "login_timeout": 10,
+    "network_timeout": 30,
+    "client_prefetch_threads": 4,
+}
+
+
 def main():
+    _configure_logging()
     cfg = load_config()
+    validate_config(cfg)
     provider_cfg = cfg["provider"]
     reader_cfg = cfg["reader"]
     reader_user_cfg = cfg.get("reader_user")
@@ -332,6 +778,12 @@ def main():
             return f"WHERE {where_val}"
         return where_val
 
+    # Resolve each object once: (shared_view_name, source_table, WHERE clause)
+    plans = [
+        (obj["shared_view_name"], obj["source_table"], normalize_where(obj.get("view_where")))
+        for obj in objects
+    ]
+
     # ------------- connect to provider -------------
 
     log(
@@ -344,9 +796,10 @@ def main():
             password=provider_password,
             account=provider_account,
             role=provider_role,
+            **CONNECT_OPTIONS,
         )
     except Exception as e:
-        log(f"ERROR: Failed to connect to provider account: {e}")
+        log_error(f"ERROR: Failed to connect to provider account: {e}")
         sys.exit(1)
 
     provider_cur = provider_conn.cursor()
@@ -358,38 +811,66 @@ def main():
         provider_share_account_id = provider_cur.fetchone()[0]
         log(f"Provider share account identifier (CURRENT_ACCOUNT) = {provider_share_account_id}")
 
-        # 1. Create schema + secure views
-        log("Ensuring shared schema and secure view(s) exist...")
-
-        provider_cur.execute(f"CREATE SCHEMA IF NOT EXISTS {provider_db}.{shared_schema}")
-
-        for obj in objects:
-            sv_name = obj["shared_view_name"]
-            src_table = obj["source_table"]
-            view_where_sql = normalize_where(obj.get("view_where"))
-            provider_cur.execute(
-                (
-                    f"CREATE OR REPLACE SECURE VIEW {provider_db}.{shared_schema}.{sv_name} AS\n"
-                    f"SELECT *\n"
-                    f"FROM {provider_db}.PUBLIC.{src_table}\n"
-                    + (f"{view_where_sql}\n" if view_where_sql else "")
-                )
+        # 1. Create schema + secure views, 2. create share + grants.
+        #    All of these are idempotent and independent of the managed account,
+        #    so they go to Snowflake as a single multi-statement round-trip.
+        log("Ensuring shared schema, secure view(s), and share with grants exist...")
+
+        provider_params = {
+            "db": provider_db,
+            "schema": f"{provider_db}.{shared_schema}",
+            "share": share_name,
+        }
+        provider_stmts = ["CREATE SCHEMA IF NOT EXISTS IDENTIFIER(%(schema)s)"]
+        for sv_name, src_table, view_where_sql in plans:
+            # Escape % in the free-form predicate since the batch is run with
+            # bound params.
+            provider_stmts.append(_VIEW_TMPL.format(
+                db=provider_db,
+                sch=shared_schema,
+                sv=sv_name,
+                src=src_table,
+                where=view_where_sql.replace("%", "%%"),
+            ))
+
+        # Keep an existing share rather than replacing it: replacing drops the
+        # share, which breaks reader databases created FROM SHARE and removes
+        # the accounts already added to it. Instead, revoke whatever the share
+        # has been granted that this config no longer wants (e.g. a view removed
+        # from data.objects), so the result matches a freshly built share.
+        wanted_grants = {
+            ("USAGE", "DATABASE", _normalize_object_name(provider_db)),
+            ("USAGE", "SCHEMA", _normalize_object_name(f"{provider_db}.{shared_schema}")),
+        }
+        for sv_name, _, _ in plans:
+            wanted_grants.add(
+                ("SELECT", "VIEW", _normalize_object_name(f"{provider_db}.{shared_schema}.{sv_name}"))
             )
-            log(f"Secure view {provider_db}.{shared_schema}.{sv_name} is ready.")
-
-        # 2. Create share + grants
-        log(f"Ensuring share {share_name} exists with proper grants...")
-        provider_cur.execute(f"CREATE OR REPLACE SHARE {share_name}")
-
-        provider_cur.execute(f"GRANT USAGE ON DATABASE {provider_db} TO SHARE {share_name}")
-        provider_cur.execute(f"GRANT USAGE ON SCHEMA {provider_db}.{shared_schema} TO SHARE {share_name}")
-        # Grant SELECT on each view to the share
-        for obj in objects:
-            sv_name = obj["shared_view_name"]
-            provider_cur.execute(
-                f"GRANT SELECT ON VIEW {provider_db}.{shared_schema}.{sv_name} TO SHARE {share_name}"
+        stale = stale_share_grants(provider_cur, share_name, wanted_grants)
+
+        provider_stmts.append("CREATE SHARE IF NOT EXISTS IDENTIFIER(%(share)s)")
+        for i, (privilege, granted_on, name) in enumerate(stale):
+            log(f"Revoking stale grant {privilege} ON {granted_on} {name} from share {share_name}.")
+            provider_params[f"stale_{i}"] = name
+            provider_stmts.append(
+                f"REVOKE {check_identifier(privilege, 'granted privilege')} "
+                f"ON {granted_on} "
+                f"IDENTIFIER(%(stale_{i})s) FROM SHARE IDENTIFIER(%(share)s)"
             )
-        log("Share and privileges ensured.")
+        provider_stmts.append("GRANT USAGE ON DATABASE IDENTIFIER(%(db)s) TO SHARE IDENTIFIER(%(share)s)")
+        provider_stmts.append("GRANT USAGE ON SCHEMA IDENTIFIER(%(schema)s) TO SHARE IDENTIFIER(%(share)s)")
+        # Grant SELECT on each view to the share. These ride in the same batch as
+        # the DDL above, so they add no round-trips. Shares don't accept
+        # ALL VIEWS / FUTURE VIEWS grants; granting per view, together with the
+        # revokes above, keeps every view not in data.objects out of the share.
+        for i, (sv_name, _, _) in enumerate(plans):
+            provider_params[f"view_{i}"] = f"{provider_db}.{shared_schema}.{sv_name}"
+            provider_stmts.append(_GRANT_VIEW_TMPL.format(i=i))
+
+        execute_batch(provider_cur, provider_stmts, provider_params)
+        for sv_name, _, _ in plans:
+            log("Secure view %s.%s.%s is ready.", provider_db, shared_schema, sv_name)
+        log(f"Share {share_name} and privileges ensured.")
 
         # 3. Ensure managed account exists + get info (name, locator, url)
         acct_info = ensure_managed_account(
@@ -420,73 +901,99 @@ def main():
             password=reader_admin_password,
             account=reader_account_identifier,
             role="ACCOUNTADMIN",      # reader admin has ACCOUNTADMIN inside reader account
+            **CONNECT_OPTIONS,
         )
     except Exception as e:
-        log(f"ERROR: Failed to connect to reader account: {e}")
+        log_error(f"ERROR: Failed to connect to reader account: {e}")
         sys.exit(1)
 
     reader_cur = reader_conn.cursor()
     log("Connected to reader account.")
 
     try:
-        # 5. Create / replace warehouse in reader
-        log(f"Ensuring warehouse {reader_wh_name} exists in reader account...")
-        reader_cur.execute(f"""
-            CREATE OR REPLACE WAREHOUSE {reader_wh_name}
+        # 5. Create warehouse if missing (then re-apply its settings),
+        # 6. create database from share if missing, 7. grants -- sent as a
+        # single multi-statement round-trip. Existing objects are kept rather
+        # than replaced, so re-runs don't drop the warehouse or re-bind the share.
+        log(
+            f"Ensuring warehouse {reader_wh_name} and database {reader_db_name} FROM SHARE "
+            "exist in reader account, with grants (idempotent)..."
+        )
+        # FROM SHARE takes a literal <account>.<share> reference, not IDENTIFIER().
+        share_ref = f"{check_identifier(provider_share_account_id, 'provider account')}.{share_name}"
+        execute_batch(reader_cur, [
+            """
+            CREATE WAREHOUSE IF NOT EXISTS IDENTIFIER(%(wh)s)
               WAREHOUSE_SIZE = 'XSMALL'
               AUTO_SUSPEND = 60
               AUTO_RESUME = TRUE
               INITIALLY_SUSPENDED = TRUE
-        """)
-        log("Warehouse ensured.")
-
-        # 6. Create / replace database from share in reader
-        log(f"Ensuring database {reader_db_name} FROM SHARE is created in reader account...")
-        reader_cur.execute(f"""
-            CREATE OR REPLACE DATABASE {reader_db_name}
-              FROM SHARE {provider_share_account_id}.{share_name}
-        """)
-        log("Shared database ensured.")
-
-        # 7. Grants in reader
-        log("Applying grants in reader account (idempotent)...")
-        reader_cur.execute(
-            f"GRANT IMPORTED PRIVILEGES ON DATABASE {reader_db_name} TO ROLE PUBLIC"
-        )
-        reader_cur.execute(
-            f"GRANT USAGE ON WAREHOUSE {reader_wh_name} TO ROLE PUBLIC"
-        )
-
-        # 8. Ensure a real user exists in reader account
-        user_result = ensure_reader_user(reader_cur, reader_user_cfg, reader_wh_name)
-
-        # 8b. If created, email credentials (if SMTP config provided)
-        if user_result and user_result.get("created"):
-            smtp_cfg = cfg.get("smtp") or {}
-            try:
-                send_credentials_email(
-                    user_name=user_result["name"],
-                    user_email=user_result["email"],
-                    temp_password=user_result["temp_password"],
-                    login_url=account_url,
-                    smtp_cfg=smtp_cfg,
-                )
-            except Exception as e:
-                # Be resilient: email failures should not abort provisioning
-                log(f"WARNING: Error during email dispatch: {e}")
+            """,
+            """
+            ALTER WAREHOUSE IDENTIFIER(%(wh)s) SET
+              WAREHOUSE_SIZE = 'XSMALL'
+              AUTO_SUSPEND = 60
+              AUTO_RESUME = TRUE
+            """,
+            f"""
+            CREATE DATABASE IF NOT EXISTS IDENTIFIER(%(db)s)
+              FROM SHARE {share_ref}
+            """,
+            "GRANT IMPORTED PRIVILEGES ON DATABASE IDENTIFIER(%(db)s) TO ROLE PUBLIC",
+            "GRANT USAGE ON WAREHOUSE IDENTIFIER(%(wh)s) TO ROLE PUBLIC",
+        ], {"wh": reader_wh_name, "db": reader_db_name})
+        log("Warehouse, shared database, and grants ensured.")
+
+        # 8. Ensure a real user exists in reader account. One SMTP session is
+        #    shared by every credentials email; it only connects on first use.
+        smtp_cfg = cfg.get("smtp") or {}
+        smtp_session = None
+        try:
+            if smtp_cfg.get("host"):
+                smtp_session = SMTPSession(smtp_cfg)
+        except Exception as e:
+            # Same policy as a failed send: report it and keep provisioning
+            log_warning(f"WARNING: Invalid SMTP config; emails will not be sent: {e}")
+            smtp_cfg = {}
+        try:
+            user_result = ensure_reader_user(reader_cur, reader_user_cfg, reader_wh_name)
+
+            # 8b. If created, email credentials (if SMTP config provided)
+            if user_result and user_result.get("created"):
+                try:
+                    send_credentials_email(
+                        user_name=user_result["name"],
+                        user_email=user_result["email"],
+                        temp_password=user_result["temp_password"],
+                        login_url=account_url,
+                        smtp_cfg=smtp_cfg,
+                        server=smtp_session,
+                    )
+                except Exception as e:
+                    # Be resilient: email failures should not abort provisioning
+                    log_warning(f"WARNING: Error during email dispatch: {e}")
+        finally:
+            if smtp_session is not None:
+                smtp_session.close()
 
         # 9. Test query
         log("Running test query in reader account...")
-        reader_cur.execute(f"USE WAREHOUSE {reader_wh_name}")
-        reader_cur.execute(f"USE DATABASE {reader_db_name}")
-        reader_cur.execute(f"USE SCHEMA {shared_schema}")
-
-        # Run a simple COUNT(*) against each shared view
-        for obj in objects:
-            sv_name = obj["shared_view_name"]
-            reader_cur.execute(f"SELECT COUNT(*) FROM {sv_name}")
+        execute_batch(reader_cur, [
+            "USE WAREHOUSE IDENTIFIER(%(wh)s)",
+            "USE DATABASE IDENTIFIER(%(db)s)",
+            "USE SCHEMA IDENTIFIER(%(schema)s)",
+        ], {"wh": reader_wh_name, "db": reader_db_name, "schema": shared_schema})
+
+        # Run a simple COUNT(*) against each shared view. Submit them all
+        # asynchronously first so they run concurrently, then collect results.
+        pending = []
+        for sv_name, _, _ in plans:
+            query_id = reader_cur.execute_async("SELECT COUNT(*) FROM IDENTIFIER(%s)", (sv_name,))["queryId"]
+            pending.append((sv_name, query_id))
+        for sv_name, query_id in pending:
+            reader_cur.get_results_from_sfqid(query_id)
             count = reader_cur.fetchone()[0]
-            log(f"Test query OK. Row count from view {sv_name}: {count}")
+            log("Test query OK. Row count from view %s: %s", sv_name, count)
 
     finally:
         reader_cur.close()